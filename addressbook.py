@@ -1,6 +1,16 @@
-from collections import UserDict
-from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right, insort
+from calendar import isleap
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+import gzip
+import json
+import os
 import pickle
+import re
+import sys
 from abc import ABC, abstractmethod
 
 # Base class for View
@@ -12,282 +22,540 @@ class View(ABC):
 # Console-based implementation of View
 class ConsoleView(View):
     def display(self, message):
-        print(message)
+        # One write per message instead of print()'s sep/end handling
+        sys.stdout.write(f"{message}\n")
+
+DATA_FILE = "addressbook.json.gz"
+LEGACY_DATA_FILE = "addressbook.pkl"
+JOURNAL_SUFFIX = ".wal"
+# Number of journalled changes after which the full book is written out again
+CHECKPOINT_EVERY = 100
+
+def save_data(book, filename=DATA_FILE):
+    # Write to a temporary file first so an interrupted save never leaves a truncated book behind
+    tmp_filename = filename + ".tmp"
+    with gzip.open(tmp_filename, "wt", encoding="utf-8") as f:
+        json.dump(book.to_dict(), f, separators=(",", ":"))
+    os.replace(tmp_filename, filename)
+    # The snapshot now contains every journalled change
+    try:
+        os.remove(filename + JOURNAL_SUFFIX)
+    except FileNotFoundError:
+        pass
+    book.dirty = 0
+
+def load_data(filename=DATA_FILE):
+    try:
+        with gzip.open(filename, "rt", encoding="utf-8") as f:
+            book = AddressBook.from_dict(json.load(f))
+    except FileNotFoundError:
+        book = load_legacy_data()
+    replay_journal(book, filename)
+    book.data_file = filename
+    return book
+
+def log_change(book, name, filename=DATA_FILE):
+    record = book.find(name)
+    entry = {"name": name, "record": record.to_dict() if record else None}
+    with open(filename + JOURNAL_SUFFIX, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    book.dirty += 1
+    if book.dirty >= CHECKPOINT_EVERY:
+        save_data(book, filename)
+
+def replay_journal(book, filename=DATA_FILE):
+    try:
+        with open(filename + JOURNAL_SUFFIX, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A change cut short by a crash: keep everything before it and
+                    # start a clean journal so new entries are not appended to the torn line
+                    break
+                if entry["record"] is None:
+                    book.delete(entry["name"])
+                else:
+                    book.add_record(Record.from_dict(entry["record"]))
+                book.dirty += 1
+            else:
+                return
+    except FileNotFoundError:
+        return
+    save_data(book, filename)
 
-def save_data(book, filename="addressbook.pkl"):
-    with open(filename, "wb") as f:
-        pickle.dump(book, f)
+# Old pickled books reference the classes by their former layout, so load them
+# as plain attribute holders and rebuild the records from their field values
+class LegacyUnpickler(pickle.Unpickler):
+    LEGACY_CLASSES = {"AddressBook", "Record", "Name", "Phone", "Birthday"}
 
-def load_data(filename="addressbook.pkl"):
+    def find_class(self, module, name):
+        if module in ("__main__", "addressbook") and name in self.LEGACY_CLASSES:
+            return SimpleNamespace
+        return super().find_class(module, name)
+
+def load_legacy_data(filename=LEGACY_DATA_FILE):
     try:
         with open(filename, "rb") as f:
-            return pickle.load(f)
+            legacy = LegacyUnpickler(f).load()
     except FileNotFoundError:
         return AddressBook()
+    records = [
+        {
+            "name": record.name._value,
+            "phones": [phone._value for phone in record.phones],
+            "birthday": record.birthday._value if record.birthday else None,
+        }
+        for record in legacy.data.values()  # pickled books were UserDicts
+    ]
+    return AddressBook.from_dict({"records": records})
+
+PHONE_PATTERN = re.compile(r"\A\d{10}\Z")
+
+def parse_ddmmyyyy(value):
+    # Slicing a fixed-width DD.MM.YYYY string is much cheaper than datetime.strptime;
+    # anything else (e.g. unpadded 1.2.2000) still goes through strptime
+    try:
+        if (len(value) == 10 and value[2] == "." and value[5] == "." and value.isascii()
+                and value[:2].isdigit() and value[3:5].isdigit() and value[6:].isdigit()):
+            return date(int(value[6:]), int(value[3:5]), int(value[:2]))
+        return datetime.strptime(value, "%d.%m.%Y").date()
+    except ValueError:
+        raise ValueError("Invalid date format. Use DD.MM.YYYY")
 
 class Field:
-    def __init__(self, value):
-        self._value = value
-
-    @property
-    def value(self):
-        return self._value
+    # value is a plain slot rather than a property; subclasses validate it in __init__
+    __slots__ = ("value",)
 
-    @value.setter
-    def value(self, new_value):
-        self._value = new_value
+    def __init__(self, value):
+        self.value = value
 
     def __str__(self):
-        return str(self._value)
+        return str(self.value)
 
 class Name(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(value)
         if not value:
             raise ValueError("Name cannot be empty")
 
 class Phone(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(value)
-        if not value.isdigit() or len(value) != 10:
+        if not PHONE_PATTERN.match(value):
             raise ValueError("Phone number must contain 10 digits")
 
 class Birthday(Field):
-    def __init__(self, value):
-        super().__init__(value)
-        try:
-            datetime.strptime(value, "%d.%m.%Y")
-        except ValueError:
-            raise ValueError("Invalid date format. Use DD.MM.YYYY")
+    __slots__ = ("_str",)
 
-    @property
-    def value(self):
-        return datetime.strptime(super().value, "%d.%m.%Y").date()
+    def __init__(self, value):
+        super().__init__(parse_ddmmyyyy(value))
+        self._str = self.value.strftime("%d.%m.%Y")
 
-    @value.setter
-    def value(self, new_value):
-        try:
-            datetime.strptime(new_value, "%d.%m.%Y")
-            super().value = new_value
-        except ValueError:
-            raise ValueError("Invalid date format. Use DD.MM.YYYY")
+    def __str__(self):
+        return self._str
 
 class Record:
+    __slots__ = ("name", "_phone_index", "birthday", "_cached_str", "_book")
+
     def __init__(self, name):
         self.name = Name(name)
-        self.phones = []
+        # number -> Phone; dicts keep insertion order, so this doubles as the phone list
+        self._phone_index = {}
         self.birthday = None
+        # Rendered form for __str__, reset whenever phones or birthday change
+        self._cached_str = None
+        # AddressBook holding this record, so changes can update its index and journal
+        self._book = None
 
     def add_phone(self, phone):
-        self.phones.append(Phone(phone))
+        if phone in self._phone_index:
+            return
+        self._phone_index[phone] = Phone(phone)
+        self._changed()
 
     def remove_phone(self, phone):
-        p = self.find_phone(phone)
-        if p:
-            self.phones.remove(p)
+        if self._phone_index.pop(phone, None):
+            self._changed()
         else:
             raise ValueError(f"Phone number {phone} not found")
 
     def edit_phone(self, old_phone, new_phone):
         p = self.find_phone(old_phone)
         if p:
+            if new_phone != old_phone and new_phone in self._phone_index:
+                raise ValueError(f"Phone number {new_phone} already exists")
             try:
                 p.value = Phone(new_phone).value
             except ValueError:
                 raise ValueError(f"Invalid new phone number {new_phone}")
+            # Rebuild rather than re-key so the edited number keeps its position
+            self._phone_index = {
+                new_phone if number == old_phone else number: phone
+                for number, phone in self._phone_index.items()
+            }
+            self._changed()
         else:
             raise ValueError(f"Phone number {old_phone} not found")
 
+    @property
+    def phones(self):
+        return list(self._phone_index.values())
+
     def find_phone(self, phone):
-        for p in self.phones:
-            if p.value == phone:
-                return p
-        return None
+        return self._phone_index.get(phone)
+
+    def _changed(self):
+        self._cached_str = None
+        if self._book is not None:
+            self._book._log(self.name.value)
 
     def add_birthday(self, birthday):
         try:
-            self.birthday = Birthday(birthday)
+            birthday = Birthday(birthday)
         except ValueError as e:
             print(e)
+            return
+        if self._book is not None:
+            self._book._unindex_birthday(self)
+        self.birthday = birthday
+        if self._book is not None:
+            self._book._index_birthday(self)
+        self._changed()
 
     def show_birthday(self):
-        return self.birthday.value.strftime("%d.%m.%Y") if self.birthday else None
+        return str(self.birthday) if self.birthday else None
+
+    def to_dict(self):
+        return {
+            "name": self.name.value,
+            "phones": [p.value for p in self.phones],
+            "birthday": str(self.birthday) if self.birthday else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls(data["name"])
+        for phone in data["phones"]:
+            record.add_phone(phone)
+        if data["birthday"]:
+            record.birthday = Birthday(data["birthday"])
+        return record
 
     def __str__(self):
-        phones_str = '; '.join(p.value for p in self.phones)
-        birthday_str = f", birthday: {self.birthday.value.strftime('%d.%m.%Y')}" if self.birthday else ""
-        return f"Contact name: {self.name.value}, phones: {phones_str}{birthday_str}"
+        if self._cached_str is None:
+            phones_str = '; '.join([p.value for p in self.phones])
+            birthday_str = f", birthday: {self.birthday}" if self.birthday else ""
+            self._cached_str = f"Contact name: {self.name.value}, phones: {phones_str}{birthday_str}"
+        return self._cached_str
+
+class AddressBook(dict):
+    def __init__(self):
+        super().__init__()
+        # ((month, day), name) pairs kept sorted, so a date window is found by bisection.
+        # Built with one sort on the first query, so bulk loads skip per-record insort
+        self._birthdays = None
+        # lowercased name -> stored name, so lookups ignore case without a scan
+        self._ci_index = {}
+        # Snapshot file whose journal receives every change; None while the book is being loaded
+        self.data_file = None
+        # Changes journalled since the last full save
+        self.dirty = 0
+
+    def _birthday_index(self):
+        if self._birthdays is None:
+            self._birthdays = sorted(
+                ((record.birthday.value.month, record.birthday.value.day), record.name.value)
+                for record in self.values() if record.birthday
+            )
+        return self._birthdays
+
+    def _index_birthday(self, record):
+        if record.birthday and self._birthdays is not None:
+            bday = record.birthday.value
+            insort(self._birthdays, ((bday.month, bday.day), record.name.value))
+
+    def _unindex_birthday(self, record):
+        if record.birthday and self._birthdays is not None:
+            bday = record.birthday.value
+            entry = ((bday.month, bday.day), record.name.value)
+            i = bisect_left(self._birthdays, entry)
+            if i < len(self._birthdays) and self._birthdays[i] == entry:
+                del self._birthdays[i]
+
+    # Every way of adding or removing a record goes through _attach/_detach,
+    # so the name and birthday indexes cannot drift from the dict itself
+    def _attach(self, record):
+        name = record.name.value
+        super().__setitem__(name, record)
+        record._book = self
+        self._ci_index[name.lower()] = name
+        self._index_birthday(record)
+        self._log(name)
+
+    def _detach(self, record):
+        name = record.name.value
+        record._book = None
+        if self._ci_index.get(name.lower()) == name:
+            del self._ci_index[name.lower()]
+        self._unindex_birthday(record)
+
+    def _log(self, name):
+        if self.data_file is not None:
+            log_change(self, name, self.data_file)
+
+    def __setitem__(self, name, record):
+        old = self.get(name)
+        if old is not None:
+            self._detach(old)
+        self._attach(record)
+
+    def __delitem__(self, name):
+        record = self[name]
+        super().__delitem__(name)
+        self._detach(record)
+        self._log(name)
+
+    def pop(self, name, *default):
+        if name not in self:
+            if default:
+                return default[0]
+            raise KeyError(name)
+        record = self[name]
+        del self[name]
+        return record
+
+    def popitem(self):
+        name, record = super().popitem()
+        self._detach(record)
+        self._log(name)
+        return name, record
+
+    def setdefault(self, name, record=None):
+        if name not in self:
+            self[name] = record
+        return self[name]
+
+    def update(self, *args, **kwargs):
+        for name, record in dict(*args, **kwargs).items():
+            self[name] = record
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        names = list(self)
+        for record in self.values():
+            self._detach(record)
+        super().clear()
+        for name in names:
+            self._log(name)
 
-class AddressBook(UserDict):
     def add_record(self, record):
-        self.data[record.name.value] = record
+        self[record.name.value] = record
 
     def find(self, name):
-        return self.data.get(name)
+        record = self.get(name)
+        if record is None:
+            record = self.get(self._ci_index.get(name.lower()))
+        return record
 
-    def delete(self, name):
-        if name in self.data:
-            del self.data[name]
+    def get_or_create(self, name):
+        record = self.get(name)
+        if record is None:
+            canonical = self._ci_index.get(name.lower())
+            if canonical is not None:
+                return self[canonical], False
+            # A miss on both lookups means there is no previous record to detach
+            record = Record(name)
+            self._attach(record)
+            return record, True
+        return record, False
 
-    def get_upcoming_birthdays(self):
-        today = datetime.now().date()
+    def delete(self, name):
+        record = self.find(name)
+        if record:
+            del self[record.name.value]
+
+    def get_upcoming_birthdays(self, today=None):
+        today = today or date.today()
+        end = today + timedelta(days=6)
+        # A window running past New Year is split into two ranges of (month, day)
+        if end.year == today.year:
+            ranges = [(today.year, (today.month, today.day), (end.month, end.day))]
+        else:
+            ranges = [
+                (today.year, (today.month, today.day), (12, 31)),
+                (end.year, (1, 1), (end.month, end.day)),
+            ]
+        birthdays = self._birthday_index()
         upcoming_birthdays = []
-        for name, record in self.data.items():
-            if record.birthday:
-                birthday_this_year = record.birthday.value.replace(year=today.year)
-                if birthday_this_year < today:
-                    birthday_this_year = birthday_this_year.replace(year=today.year + 1)
-
-                delta = birthday_this_year - today
-                if 0 <= delta.days < 7:
-                    greeting_date = birthday_this_year
-                    if greeting_date.weekday() >= 5:
-                        days_to_add = 2 if greeting_date.weekday() == 5 else 1
-                        greeting_date += timedelta(days=days_to_add)
-                    upcoming_birthdays.append({"name": name, "birthday": greeting_date.strftime("%Y.%m.%d")})
+        for year, start_key, end_key in ranges:
+            if start_key == (3, 1) and not isleap(year):
+                # Pull in 29 February birthdays, which land on 1 March in a non-leap year
+                start_key = (2, 29)
+            lo = bisect_left(birthdays, start_key, key=itemgetter(0))
+            hi = bisect_right(birthdays, end_key, key=itemgetter(0))
+            for (month, day), name in birthdays[lo:hi]:
+                try:
+                    birthday_this_year = date(year, month, day)
+                except ValueError:
+                    # 29 February outside a leap year is celebrated on 1 March
+                    birthday_this_year = date(year, 3, 1)
+                greeting_date = birthday_this_year
+                if greeting_date.weekday() >= 5:
+                    days_to_add = 2 if greeting_date.weekday() == 5 else 1
+                    greeting_date += timedelta(days=days_to_add)
+                upcoming_birthdays.append((greeting_date, name))
         return upcoming_birthdays
 
+    def to_dict(self):
+        return {"records": [record.to_dict() for record in self.values()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        book = cls()
+        for record_data in data["records"]:
+            book.add_record(Record.from_dict(record_data))
+        return book
+
     def __str__(self):
-        return "\n".join(str(record) for record in self.data.values())
+        return "\n".join([str(record) for record in self.values()])
+
+@lru_cache(maxsize=512)
+def parse_input(user_input):
+    parts = user_input.split()
+    if not parts:
+        return "", ()
+    return parts[0].lower(), tuple(parts[1:])
+
+def input_error(func):
+    def inner(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except ValueError as e:
+            return str(e)
+        except KeyError:
+            return "Contact not found."
+        except IndexError:
+            return "Invalid command format. Please try again."
+        except Exception as e:
+            return f"An unexpected error occurred: {e}"
+    return inner
+
+def hello(args, book):
+    return "How can I help you?"
+
+def help_command(args, book):
+    commands = [
+        "add <name> <phone> - Add or update a contact",
+        "change <name> <old_phone> <new_phone> - Change a contact's phone",
+        "phone <name> - Show phones of a contact",
+        "all - Show all contacts",
+        "add-birthday <name> <dd.mm.yyyy> - Add birthday",
+        "show-birthday <name> - Show birthday",
+        "birthdays - Show upcoming birthdays",
+        "help - Show this help message",
+        "exit / close - Exit the bot"
+    ]
+    return "\nAvailable commands:\n" + "\n".join(commands)
+
+@input_error
+def add_contact(args, book):
+    name, phone, *_ = args
+    record, created = book.get_or_create(name)
+    message = "Contact added." if created else "Contact updated."
+    if phone:
+        record.add_phone(phone)
+    return message
+
+@input_error
+def change_contact(args, book):
+    name, old_phone, new_phone = args
+    record = book.find(name)
+    if record:
+        record.edit_phone(old_phone, new_phone)
+        return "Contact updated."
+    else:
+        raise KeyError
+
+@input_error
+def show_phone(args, book):
+    name = args[0]
+    record = book.find(name)
+    if record:
+        return f"{name}: {'; '.join(p.value for p in record.phones)}"
+    else:
+        raise KeyError
+
+@input_error
+def show_all(args, book):
+    return str(book) if book else "The address book is empty."
+
+@input_error
+def add_birthday(args, book):
+    name, birthday = args
+    record = book.find(name)
+    if record:
+        record.add_birthday(birthday)
+        return "Birthday added."
+    else:
+        raise KeyError
+
+@input_error
+def show_birthday(args, book):
+    name = args[0]
+    record = book.find(name)
+    if record:
+        birthday = record.show_birthday()
+        return f"{name}'s birthday: {birthday}" if birthday else f"{name}'s birthday is not set."
+    else:
+        raise KeyError
+
+@input_error
+def birthdays(args, book):
+    upcoming = book.get_upcoming_birthdays()
+    if upcoming:
+        result = "Upcoming birthdays:\n"
+        for greeting_date, group in groupby(sorted(upcoming, key=itemgetter(0)), key=itemgetter(0)):
+            names = ", ".join(name for _, name in group)
+            result += f"{greeting_date.strftime('%A %d.%m')}: {names}\n"
+        return result.strip()
+    else:
+        return "No upcoming birthdays in the next 7 days."
+
+HANDLERS = {
+    "hello": hello,
+    "add": add_contact,
+    "change": change_contact,
+    "phone": show_phone,
+    "all": show_all,
+    "add-birthday": add_birthday,
+    "show-birthday": show_birthday,
+    "birthdays": birthdays,
+    "help": help_command,
+}
 
 def main():
     view = ConsoleView()
     book = load_data()
     view.display("Welcome to the assistant bot!")
 
-    def help_command():
-        commands = [
-            "add <name> <phone> - Add or update a contact",
-            "change <name> <old_phone> <new_phone> - Change a contact's phone",
-            "phone <name> - Show phones of a contact",
-            "all - Show all contacts",
-            "add-birthday <name> <dd.mm.yyyy> - Add birthday",
-            "show-birthday <name> - Show birthday",
-            "birthdays - Show upcoming birthdays",
-            "help - Show this help message",
-            "exit / close - Exit the bot"
-        ]
-        view.display("\nAvailable commands:\n" + "\n".join(commands))
-
-    def parse_input(user_input):
-        if not user_input:
-            return "", []
-        parts = user_input.strip().split()
-        return parts[0].lower(), parts[1:]
-
-    def input_error(func):
-        def inner(*args, **kwargs):
-            try:
-                return func(*args, **kwargs)
-            except ValueError as e:
-                return str(e)
-            except KeyError:
-                return "Contact not found."
-            except IndexError:
-                return "Invalid command format. Please try again."
-            except Exception as e:
-                return f"An unexpected error occurred: {e}"
-        return inner
-
-    @input_error
-    def add_contact(args, book):
-        name, phone, *_ = args
-        record = book.find(name)
-        message = "Contact updated."
-        if record is None:
-            record = Record(name)
-            book.add_record(record)
-            message = "Contact added."
-        if phone:
-            record.add_phone(phone)
-        return message
-
-    @input_error
-    def change_contact(args, book):
-        name, old_phone, new_phone = args
-        record = book.find(name)
-        if record:
-            record.edit_phone(old_phone, new_phone)
-            return "Contact updated."
-        else:
-            raise KeyError
-
-    @input_error
-    def show_phone(args, book):
-        name = args[0]
-        record = book.find(name)
-        if record:
-            return f"{name}: {'; '.join(p.value for p in record.phones)}"
-        else:
-            raise KeyError
-
-    @input_error
-    def show_all(book):
-        return str(book) if book else "The address book is empty."
-
-    @input_error
-    def add_birthday(args, book):
-        name, birthday = args
-        record = book.find(name)
-        if record:
-            record.add_birthday(birthday)
-            return "Birthday added."
-        else:
-            raise KeyError
-
-    @input_error
-    def show_birthday(args, book):
-        name = args[0]
-        record = book.find(name)
-        if record:
-            birthday = record.show_birthday()
-            return f"{name}'s birthday: {birthday}" if birthday else f"{name}'s birthday is not set."
-        else:
-            raise KeyError
-
-    @input_error
-    def birthdays(args, book):
-        upcoming = book.get_upcoming_birthdays()
-        if upcoming:
-            result = "Upcoming birthdays:\n"
-            birthdays_by_day = {}
-            for item in upcoming:
-                day = item['birthday']  # Already in YYYY.mm.dd format
-                key = datetime.strptime(day, "%Y.%m.%d").strftime("%m-%d")  # avoid using day without year
-                display_day = datetime.strptime(day, "%Y.%m.%d").strftime("%A %d.%m")
-                birthdays_by_day.setdefault(key, (display_day, []) )[1].append(item['name'])
-            for key, (display_day, names) in sorted(birthdays_by_day.items()):
-                result += f"{display_day}: {', '.join(names)}\n"
-            return result.strip()
-        else:
-            return "No upcoming birthdays in the next 7 days."
-
     while True:
         user_input = input("Enter a command: ")
         command, args = parse_input(user_input)
 
-        if command in ["close", "exit"]:
-            save_data(book)
+        if command in ("close", "exit"):
             view.display("Good bye!")
             break
-        elif command == "hello":
-            view.display("How can I help you?")
-        elif command == "add":
-            view.display(add_contact(args, book))
-        elif command == "change":
-            view.display(change_contact(args, book))
-        elif command == "phone":
-            view.display(show_phone(args, book))
-        elif command == "all":
-            view.display(show_all(book))
-        elif command == "add-birthday":
-            view.display(add_birthday(args, book))
-        elif command == "show-birthday":
-            view.display(show_birthday(args, book))
-        elif command == "birthdays":
-            view.display(birthdays(args, book))
-        elif command == "help":
-            help_command()
+        handler = HANDLERS.get(command)
+        if handler:
+            view.display(handler(args, book))
         else:
             view.display("Invalid command. Type 'help' to see available commands.")
 
@@ -0,0 +1,70 @@
+from datetime import date
+import os
+
+from addressbook import JOURNAL_SUFFIX, AddressBook, Record, load_data
+
+
+def make_book(**birthdays):
+    book = AddressBook()
+    for name, birthday in birthdays.items():
+        record = Record(name)
+        record.add_birthday(birthday)
+        book.add_record(record)
+    return book
+
+
+def test_leap_day_birthday_when_window_starts_on_1_march():
+    book = make_book(Leap="29.02.2000")
+    # 2027 is not a leap year, so 29 February is celebrated on Monday 1 March
+    assert book.get_upcoming_birthdays(date(2027, 3, 1)) == [(date(2027, 3, 1), "Leap")]
+    assert book.get_upcoming_birthdays(date(2027, 2, 23)) == [(date(2027, 3, 1), "Leap")]
+    assert book.get_upcoming_birthdays(date(2027, 3, 2)) == []
+    assert book.get_upcoming_birthdays(date(2028, 3, 1)) == []
+    assert book.get_upcoming_birthdays(date(2028, 2, 29)) == [(date(2028, 2, 29), "Leap")]
+
+
+def test_window_crossing_new_year():
+    book = make_book(Dec="29.12.1990", Eve="31.12.2000", Jan="02.01.1985", Late="04.01.1980")
+    # 28.12.2026 to 03.01.2027; Saturday 2 January is greeted on Monday 4 January
+    assert book.get_upcoming_birthdays(date(2026, 12, 28)) == [
+        (date(2026, 12, 29), "Dec"),
+        (date(2026, 12, 31), "Eve"),
+        (date(2027, 1, 4), "Jan"),
+    ]
+
+
+def test_birthday_index_follows_dict_operations():
+    today = date(2026, 10, 15)
+    book = make_book(Ann="16.10.2000")
+    tom = Record("Tom")
+    tom.add_birthday("17.10.2000")
+    book["Tom"] = tom
+    assert book.find("tom") is tom
+    assert [name for _, name in book.get_upcoming_birthdays(today)] == ["Ann", "Tom"]
+
+    book.pop("Ann")
+    tom.add_birthday("01.01.2000")
+    assert book.find("ann") is None
+    assert book.get_upcoming_birthdays(today) == []
+
+
+def test_journal_replay_stops_at_truncated_last_line(tmp_path, monkeypatch):
+    # Keep load_data away from any legacy addressbook.pkl in the working directory
+    monkeypatch.chdir(tmp_path)
+    data_file = str(tmp_path / "book.json.gz")
+    book = load_data(data_file)
+    book.get_or_create("Ann")[0].add_phone("1234567890")
+    book.get_or_create("Bob")[0].add_birthday("01.02.2000")
+    book.find("ann").add_birthday("1.2.2000x")  # invalid, so nothing is journalled
+    with open(data_file + JOURNAL_SUFFIX, "a", encoding="utf-8") as f:
+        f.write('{"name":"Cid","rec')
+
+    recovered = load_data(data_file)
+    assert str(recovered) == (
+        "Contact name: Ann, phones: 1234567890\n"
+        "Contact name: Bob, phones: , birthday: 01.02.2000"
+    )
+    # The torn line is folded into a fresh snapshot, so new entries start a clean journal
+    assert not os.path.exists(data_file + JOURNAL_SUFFIX)
+    recovered.find("bob").add_phone("5555555555")
+    assert load_data(data_file).find("bob").find_phone("5555555555")